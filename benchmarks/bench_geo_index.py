@@ -0,0 +1,177 @@
+"""
+Benchmark GeoIndex bulk loading and query time over a large photo collection
+
+Usage:
+    python benchmarks/bench_geo_index.py [--photos N] [--queries N]
+
+Indexes N random locations (clustered around a handful of cities, like a
+real photo library) and times radius and bounding-box queries against a
+brute-force scan of every entry. Radius results are checked against the
+brute-force scan (including points just inside the radius around cell
+boundaries), and bulk loading / reloading is timed for the SQLite store.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import photo_check  # noqa: E402
+
+CITIES = [
+    (48.8566, 2.3522),     # Paris
+    (40.7128, -74.0060),   # New York
+    (35.6762, 139.6503),   # Tokyo
+    (-33.8688, 151.2093),  # Sydney
+    (-16.5000, 179.9500),  # Fiji (antimeridian)
+]
+
+
+def make_entries(count, rng):
+    """
+    Generate index entries, 80% clustered near cities and 20% scattered worldwide
+    """
+    entries = []
+    for i in range(count):
+        if rng.random() < 0.8:
+            lat, lon = rng.choice(CITIES)
+            lat += rng.gauss(0, 0.5)
+            lon += rng.gauss(0, 0.5)
+        else:
+            lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        entries.append({"hash": f"{i:032x}", "filename": f"photo_{i}.jpg", "latitude": lat, "longitude": lon})
+    return entries
+
+
+def brute_force_nearby(entries, lat, lon, radius_km):
+    return [e for e in entries if photo_check.haversine_km(lat, lon, e["latitude"], e["longitude"]) <= radius_km]
+
+
+def destination(lat, lon, bearing_deg, distance_km):
+    """
+    Point reached by travelling distance_km from (lat, lon) along a bearing
+    """
+    angular = distance_km / photo_check.EARTH_RADIUS_KM
+    phi1, lambda1, theta = math.radians(lat), math.radians(lon), math.radians(bearing_deg)
+    phi2 = math.asin(math.sin(phi1) * math.cos(angular) + math.cos(phi1) * math.sin(angular) * math.cos(theta))
+    lambda2 = lambda1 + math.atan2(
+        math.sin(theta) * math.sin(angular) * math.cos(phi1),
+        math.cos(angular) - math.sin(phi1) * math.sin(phi2)
+    )
+    return math.degrees(phi2), photo_check._normalize_lon(math.degrees(lambda2))
+
+
+def check_nearby(geo_index, entries, queries):
+    """
+    Compare index results with a brute-force scan; returns the number of mismatching queries
+    """
+    mismatches = 0
+    for lat, lon, radius in queries:
+        expected = {e["hash"] for e in brute_force_nearby(entries, lat, lon, radius)}
+        found = {e["hash"] for e in geo_index.nearby(lat, lon, radius)}
+        if found != expected:
+            mismatches += 1
+            print(f"  MISMATCH at ({lat:.6f}, {lon:.6f}) r={radius}km: "
+                  f"{len(expected - found)} missing, {len(found - expected)} extra")
+    return mismatches
+
+
+def make_edge_cases(rng, count):
+    """
+    Queries centred just below cell boundaries with points placed just inside the radius
+    """
+    cell = photo_check.GEO_CELL_SIZE
+    entries, queries = [], []
+    for i in range(count):
+        lat = rng.randrange(-1500, 1500) * cell - 1e-9
+        lon = rng.randrange(-3600, 3600) * cell - 1e-9
+        radius = rng.choice((0.5, 5, 100, 1000))
+        for j in range(16):
+            point_lat, point_lon = destination(lat, lon, j * 22.5 + rng.random(), radius * (1 - 1e-5))
+            entries.append({"hash": f"edge-{i}-{j}", "latitude": point_lat, "longitude": point_lon})
+        queries.append((lat, lon, radius))
+    return entries, queries
+
+
+def time_queries(func, queries):
+    """
+    Return (mean time per query in microseconds, total results)
+    """
+    total = 0
+    start = time.perf_counter()
+    for query in queries:
+        total += len(func(*query))
+    return (time.perf_counter() - start) / len(queries) * 1e6, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--photos", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--check", type=int, default=10, help="queries to verify against brute force")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    entries = make_entries(args.photos, rng)
+
+    geo_index = photo_check.GeoIndex()
+    start = time.perf_counter()
+    geo_index.add_many(entries)
+    print(f"Bulk indexed {len(geo_index):,} photos in {time.perf_counter() - start:.2f}s")
+
+    points = [(lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)) for lat, lon in (rng.choice(CITIES) for _ in range(args.queries))]
+    normalize = photo_check._normalize_lon
+
+    print()
+    print(f"{'query':<28}{'index':>12}{'brute force':>14}{'results':>10}")
+    for radius in (1, 10, 50):
+        queries = [(lat, normalize(lon), radius) for lat, lon in points]
+        indexed_us, found = time_queries(geo_index.nearby, queries)
+        # Brute force is slow; time a sample of the queries
+        brute_us, _ = time_queries(lambda *q: brute_force_nearby(entries, *q), queries[:5])
+        print(f"{f'nearby radius={radius}km':<28}{indexed_us:>10.1f}us{brute_us:>12.0f}us{found / len(queries):>10.1f}")
+
+    for size in (0.1, 1.0):
+        queries = [(lat - size / 2, normalize(lon - size / 2), lat + size / 2, normalize(lon + size / 2)) for lat, lon in points]
+        indexed_us, found = time_queries(geo_index.within_bbox, queries)
+        print(f"{f'bbox {size}x{size} deg':<28}{indexed_us:>10.1f}us{'-':>14}{found / len(queries):>10.1f}")
+
+    print()
+    print("Correctness (index vs brute force)")
+    sample = [(lat, normalize(lon), radius) for lat, lon in points[:args.check] for radius in (1, 10, 50)]
+    mismatches = check_nearby(geo_index, entries, sample)
+    print(f"  {len(sample)} sampled queries: {mismatches} mismatches")
+
+    edge_entries, edge_queries = make_edge_cases(rng, 200)
+    edge_index = photo_check.GeoIndex()
+    edge_index.add_many(edge_entries)
+    edge_mismatches = check_nearby(edge_index, edge_entries, edge_queries)
+    print(f"  {len(edge_queries)} cell-boundary queries: {edge_mismatches} mismatches")
+
+    print()
+    print("SQLite-backed index")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "geo_index.sqlite3")
+        start = time.perf_counter()
+        photo_check.GeoIndex(db_path).add_many(entries)
+        print(f"  bulk store {len(entries):,} photos: {time.perf_counter() - start:.2f}s")
+
+        # A fresh index (e.g. a restarted or different worker) loads the stored entries
+        reloaded = photo_check.GeoIndex(db_path)
+        start = time.perf_counter()
+        count = len(reloaded)
+        print(f"  reload {count:,} photos: {time.perf_counter() - start:.2f}s")
+
+        indexed_us, _ = time_queries(reloaded.nearby, [(lat, normalize(lon), 1) for lat, lon in points])
+        print(f"  nearby radius=1km: {indexed_us:.1f}us")
+
+    if mismatches or edge_mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark /upload response serialization time and bytes-on-wire
+
+Usage:
+    python benchmarks/bench_responses.py [--iterations N]
+
+Builds a typical classification response (synthetic photo with EXIF data,
+five predictions) and compares the old jsonify-style encoding with the
+optimized response layer in photo_check.py.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import photo_check  # noqa: E402
+
+
+def make_sample_image():
+    """
+    Create a noisy 1600x1200 JPEG with a realistic set of EXIF tags
+    """
+    rng = np.random.default_rng(42)
+    gradient = np.linspace(0, 255, 1600, dtype=np.uint8)
+    pixels = np.stack([
+        np.tile(gradient, (1200, 1)),
+        np.tile(gradient[::-1], (1200, 1)),
+        rng.integers(0, 255, (1200, 1600), dtype=np.uint8),
+    ], axis=-1)
+    img = Image.fromarray(pixels, "RGB")
+
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"                   # Make
+    exif[0x0110] = "Canon EOS 5D Mark IV"    # Model
+    exif[0x0131] = "Adobe Photoshop 22.0"    # Software
+    exif[0x0132] = "2023:06:15 14:30:00"     # DateTime
+    exif[0x013B] = "Jane Photographer"       # Artist
+    exif[0x8298] = "Copyright 2023"          # Copyright
+
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=90, exif=exif)
+    return buffered.getvalue()
+
+
+def make_sample_response():
+    """
+    Run the real formatting pipeline on a synthetic photo and fake predictions
+    """
+    image_bytes = make_sample_image()
+    metadata = photo_check.get_image_metadata(image_bytes)
+    metadata["filename"] = "sample.jpg"
+
+    predictions = [
+        {"label": "golden retriever", "score": 0.8123},
+        {"label": "Labrador retriever, dog", "score": 0.1021},
+        {"label": "tennis ball", "score": 0.0412},
+        {"label": "seashore, coast, beach", "score": 0.0201},
+        {"label": "sports car, vehicle", "score": 0.0087},
+    ]
+    result = photo_check.format_predictions({"predictions": predictions, "request_time": 0.42, "metadata": metadata})
+    result["insights"] = photo_check.extract_image_insights(result["predictions"], metadata)
+    result["metadata"]["total_processing_time"] = "0.57 seconds"
+    result["metadata"]["processing_time_seconds"] = 0.5712
+    return result
+
+
+def time_call(func, payload, iterations):
+    """
+    Return the mean time of func(payload) in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def jsonify_style(payload):
+    """
+    What flask.jsonify did for /upload (stdlib json, sorted keys)
+    """
+    return (json.dumps(payload, sort_keys=True, indent=None, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    full = make_sample_response()
+    compact = photo_check.compact_response(full)
+
+    serializers = [("json (jsonify)", jsonify_style)]
+    if photo_check.orjson is not None:
+        serializers.append(("orjson", photo_check.serialize_json))
+    if photo_check.msgpack is not None:
+        serializers.append(("msgpack", photo_check.serialize_msgpack))
+
+    print(f"Serialization time ({args.iterations} iterations, mean per response)")
+    print(f"{'serializer':<16}{'schema 1':>12}{'schema 2':>12}")
+    for name, func in serializers:
+        print(f"{name:<16}{time_call(func, full, args.iterations):>10.1f}us"
+              f"{time_call(func, compact, args.iterations):>10.1f}us")
+
+    print()
+    print("Bytes on wire")
+    encodings = [("identity", lambda body: body), ("gzip", lambda body: gzip.compress(body, photo_check.GZIP_LEVEL))]
+    if photo_check.brotli is not None:
+        encodings.append(("br", lambda body: photo_check.compress_body(body, "br")))
+
+    print(f"{'format':<24}" + "".join(f"{name:>12}" for name, _ in encodings))
+    for schema, payload in (("schema 1", full), ("schema 2", compact)):
+        for name, func in serializers:
+            body = func(payload)
+            sizes = "".join(f"{len(encode(body)):>12,}" for _, encode in encodings)
+            print(f"{name + ' / ' + schema:<24}{sizes}")
+
+    print()
+    print("Compression time (mean per response, orjson schema 1 body)")
+    body = photo_check.serialize_json(full)
+    for name, encode in encodings[1:]:
+        print(f"{name:<16}{time_call(encode, body, max(args.iterations // 10, 1)):>10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
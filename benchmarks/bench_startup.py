@@ -0,0 +1,118 @@
+"""
+Benchmark photo_check startup cost with `python -X importtime`
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--baseline REV]
+
+Measures, in fresh interpreters:
+- import:    `import photo_check`
+- create_app: importing and building the Flask app
+- warm_up:   importing, building the app and preloading codecs/pools
+
+With --baseline, photo_check.py from the given git revision is imported
+the same way (with dummy API credentials, which older revisions require)
+so the numbers can be compared side by side.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SCENARIOS = [
+    ("import", "import photo_check"),
+    ("create_app", "import photo_check; photo_check.create_app()"),
+    ("warm_up", "import photo_check; photo_check.create_app(); photo_check.warm_up()"),
+]
+
+HEAVY_MODULES = ("flask", "numpy", "PIL.Image", "requests", "dotenv")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+DUMMY_ENV = {
+    "HUGGING_FACE_API_URL": "https://example.invalid/model",
+    "HUGGING_FACE_API_KEY": "hf_" + "x" * 40,
+}
+
+
+def run_importtime(statement, cwd):
+    """
+    Run a statement with -X importtime and return {module: cumulative_us} for top-level imports
+    """
+    env = dict(os.environ, **DUMMY_ENV)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+
+    cumulative = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cum_us, indent, module = match.groups()
+        cumulative.setdefault(module, int(cum_us))
+        # Only count top-level imports (nested ones are already in their parent's cumulative time)
+        if len(indent) == 1:
+            total += int(cum_us)
+    cumulative["<total>"] = total
+    return cumulative
+
+
+def measure(statement, cwd, runs):
+    """
+    Return the median total import time (ms) and the set of heavy modules loaded
+    """
+    totals = []
+    loaded = set()
+    for _ in range(runs):
+        cumulative = run_importtime(statement, cwd)
+        totals.append(cumulative["<total>"] / 1000)
+        loaded = {name for name in HEAVY_MODULES if name in cumulative}
+    return statistics.median(totals), loaded
+
+
+def export_baseline(rev, directory):
+    """
+    Write photo_check.py from a git revision into directory
+    """
+    source = subprocess.run(
+        ["git", "show", f"{rev}:photo_check.py"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    with open(os.path.join(directory, "photo_check.py"), "w") as f:
+        f.write(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    targets = [("current", REPO_ROOT, SCENARIOS)]
+    tmpdir = None
+    if args.baseline:
+        tmpdir = tempfile.TemporaryDirectory()
+        export_baseline(args.baseline, tmpdir.name)
+        # Older revisions create the app at import time and have no factory
+        targets.append((args.baseline, tmpdir.name, SCENARIOS[:1]))
+
+    print(f"Startup time (median of {args.runs} runs, sum of top-level imports)")
+    print(f"{'version':<12}{'scenario':<12}{'time':>10}  heavy modules loaded")
+    for label, cwd, scenarios in targets:
+        for name, statement in scenarios:
+            median_ms, loaded = measure(statement, cwd, args.runs)
+            print(f"{label:<12}{name:<12}{median_ms:>8.1f}ms  {', '.join(sorted(loaded)) or '-'}")
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,312 @@
-from flask import Flask, render_template, request, jsonify
-import requests
 import os
-from dotenv import load_dotenv
 import logging
-from PIL import Image
-from PIL.ExifTags import TAGS
 import io
+import sys
+import json
+import gzip
 import time
 import hashlib
-import numpy as np
+import math
 from datetime import datetime
-import base64
 import traceback
-import webbrowser
-import threading
+
+# Heavy modules (flask, numpy, PIL, requests) are imported where they are used,
+# so importing this module stays cheap for workers, tests and CLI tools.
+# Call warm_up() after fork to pay those costs before the first request.
+
+# Optional fast serializers / compressors (fall back to stdlib when missing)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Response encoding configuration
+COMPRESSION_MIN_SIZE = 1024  # Don't bother compressing tiny payloads
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Good ratio while staying fast enough for per-request use
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# HTTP connection pool configuration
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 10
+
+PLACEHOLDER_API_KEYS = ("hf_your_actual_api_key_here", "hf_your_new_api_key_here")
+
 # --- Configuration ---
-load_dotenv()
+def load_config():
+    """
+    Read application configuration from the environment (and .env file)
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    return {
+        "HUGGING_FACE_API_URL": os.getenv("HUGGING_FACE_API_URL"),
+        "HUGGING_FACE_API_KEY": os.getenv("HUGGING_FACE_API_KEY"),
+        "FLASK_ENV": os.getenv("FLASK_ENV", "development"),
+        "FLASK_DEBUG": os.getenv("FLASK_DEBUG", "True").lower() == "true",
+        "MAX_CONTENT_LENGTH": 16 * 1024 * 1024,  # 16MB max file size
+    }
+
+def validate_config(config):
+    """
+    Check that the Hugging Face API settings are present and look real
+    """
+    api_url = config.get("HUGGING_FACE_API_URL")
+    api_key = config.get("HUGGING_FACE_API_KEY")
+
+    if not api_url or not api_key:
+        logger.error("HUGGING_FACE_API_URL and HUGGING_FACE_API_KEY must be set in .env file")
+        raise ValueError("HUGGING_FACE_API_URL and HUGGING_FACE_API_KEY must be set in .env file")
+
+    if api_key in PLACEHOLDER_API_KEYS or len(api_key) < 30:
+        logger.warning("Please replace the placeholder with your actual Hugging Face API key")
+
+def ensure_config_validated(app):
+    """
+    Run validate_config() for an app the first time it's needed
+    """
+    if not app.config.get("CONFIG_VALIDATED"):
+        validate_config(app.config)
+        app.config["CONFIG_VALIDATED"] = True
+
+# --- Application Factory ---
+def create_app(config=None):
+    """
+    Create and configure the Flask application
+
+    Configuration is read from the environment but not validated here, so the
+    app can be created without API credentials (e.g. in tests).
+    """
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+
+    app.add_url_rule('/', 'index', index)
+    app.add_url_rule('/upload', 'upload', upload, methods=['POST'])
+    app.add_url_rule('/health', 'health_check', health_check)
+    app.add_url_rule('/nearby', 'nearby', nearby)
+    app.add_url_rule('/within', 'within', within)
+    app.add_url_rule('/index', 'index_images', index_images, methods=['POST'])
+    app.register_error_handler(413, too_large)
+    app.register_error_handler(500, internal_server_error)
+
+    # Index of geotagged images, stored in the instance folder and shared by all workers
+    # (the database and its folder are only created on first use)
+    app.config.setdefault("GEO_INDEX_PATH", os.path.join(app.instance_path, "geo_index.sqlite3"))
+    app.extensions["geo_index"] = GeoIndex(app.config["GEO_INDEX_PATH"])
+
+    return app
+
+def __getattr__(name):
+    """
+    Create the module-level `app` on first access (keeps `photo_check:app` working)
+    """
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- HTTP Session ---
+_http_session = None
+
+def get_http_session():
+    """
+    Return the per-process requests session used for Hugging Face API calls
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+    return _http_session
 
-# Environment variables
-API_URL = os.getenv("HUGGING_FACE_API_URL")
-API_KEY = os.getenv("HUGGING_FACE_API_KEY")
-FLASK_ENV = os.getenv("FLASK_ENV", "development")
-FLASK_DEBUG = os.getenv("FLASK_DEBUG", "True").lower() == "true"
+def _reset_http_session():
+    """
+    Drop the session inherited from the parent so workers never share sockets
+    """
+    global _http_session
+    _http_session = None
 
-# Validate required environment variables
-if not API_URL or not API_KEY:
-    logger.error("HUGGING_FACE_API_URL and HUGGING_FACE_API_KEY must be set in .env file")
-    raise ValueError("HUGGING_FACE_API_URL and HUGGING_FACE_API_KEY must be set in .env file")
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_http_session)
+
+def warm_up(api_url=None):
+    """
+    Preload heavy modules, image codecs and the HTTP connection pool
 
-if API_KEY == "hf_your_actual_api_key_here" or API_KEY == "hf_your_new_api_key_here" or API_KEY.startswith("hf_") and len(API_KEY) < 30:
-    logger.warning("Please replace the placeholder with your actual Hugging Face API key")
+    Meant to run once per worker after fork, e.g. in gunicorn.conf.py:
+
+        def post_fork(server, worker):
+            photo_check.warm_up()
+
+    A connection to the Hugging Face API (api_url, or HUGGING_FACE_API_URL
+    from the environment) is opened so the first upload doesn't pay for the
+    TLS handshake.
+    """
+    start_time = time.time()
 
-# Flask app configuration
-app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    if api_url is None:
+        api_url = load_config()["HUGGING_FACE_API_URL"]
+
+    import numpy  # noqa: F401
+    from PIL import Image
+
+    # Register all image plugins and exercise the JPEG codec used for thumbnails
+    Image.init()
+    buffered = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buffered, format="JPEG")
+    Image.open(io.BytesIO(buffered.getvalue())).load()
+
+    session = get_http_session()
+    if api_url:
+        try:
+            session.head(api_url, timeout=5)
+        except Exception as e:
+            logger.warning(f"Warm-up connection failed: {str(e)}")
+
+    logger.info(f"Warm-up time: {time.time() - start_time:.2f} seconds")
 
 # --- Helper Functions ---
+GPS_INFO_TAG = 0x8825
+EXIF_IFD_TAG = 0x8769
+
+def _rational_to_float(value):
+    """
+    Convert an EXIF rational (IFDRational or a (numerator, denominator) tuple) to float
+    """
+    if isinstance(value, tuple) and len(value) == 2:
+        num, denom = value
+        return float(num) / float(denom) if denom else float("nan")
+    return float(value)
+
+def _dms_to_degrees(dms, ref):
+    """
+    Convert degrees/minutes/seconds rationals plus a hemisphere ref to signed decimal degrees
+    """
+    if not isinstance(dms, (tuple, list)):
+        dms = (dms,)
+    parts = [_rational_to_float(v) for v in dms] + [0.0, 0.0]
+    degrees = parts[0] + parts[1] / 60 + parts[2] / 3600
+
+    if isinstance(ref, bytes):
+        ref = ref.decode("ascii", errors="ignore")
+    if isinstance(ref, str) and ref.strip().upper() in ("S", "W"):
+        degrees = -degrees
+    return degrees
+
+def decode_gps_info(gps_raw):
+    """
+    Decode a raw EXIF GPSInfo dict into numeric location data
+
+    Returns a dict with latitude/longitude (decimal degrees) and, when present,
+    altitude (metres, negative below sea level) and gps_timestamp. Missing or
+    invalid coordinates are left out.
+    """
+    from PIL.ExifTags import GPSTAGS
+
+    gps = {GPSTAGS.get(key, key): value for key, value in gps_raw.items()}
+    location = {}
+
+    try:
+        if "GPSLatitude" in gps and "GPSLongitude" in gps:
+            lat = _dms_to_degrees(gps["GPSLatitude"], gps.get("GPSLatitudeRef"))
+            lon = _dms_to_degrees(gps["GPSLongitude"], gps.get("GPSLongitudeRef"))
+            if math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180:
+                location["latitude"] = round(lat, 7)
+                location["longitude"] = round(lon, 7)
+    except (TypeError, ValueError, ZeroDivisionError) as e:
+        logger.warning(f"GPS coordinate decoding error: {str(e)}")
+
+    try:
+        if "GPSAltitude" in gps:
+            altitude = _rational_to_float(gps["GPSAltitude"])
+            ref = gps.get("GPSAltitudeRef", 0)
+            if isinstance(ref, bytes):
+                ref = ref[0] if ref else 0
+            if math.isfinite(altitude):
+                location["altitude"] = round(-altitude if ref == 1 else altitude, 2)
+    except (TypeError, ValueError, ZeroDivisionError) as e:
+        logger.warning(f"GPS altitude decoding error: {str(e)}")
+
+    try:
+        if "GPSTimeStamp" in gps:
+            hours, minutes, seconds = (_rational_to_float(v) for v in gps["GPSTimeStamp"])
+            time_str = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
+            date_str = str(gps.get("GPSDateStamp", "")).strip()
+            if date_str:
+                date = datetime.strptime(date_str, "%Y:%m:%d").strftime("%Y-%m-%d")
+                location["gps_timestamp"] = f"{date}T{time_str}Z"
+            else:
+                location["gps_timestamp"] = time_str
+    except (TypeError, ValueError, ZeroDivisionError) as e:
+        logger.warning(f"GPS timestamp decoding error: {str(e)}")
+
+    return location
+
+def get_image_location(image_bytes):
+    """
+    Read only the hash, GPS location and a few EXIF fields from an image
+
+    A cheap alternative to get_image_metadata for bulk indexing: only the
+    image header is parsed, pixels are never decoded.
+    """
+    from PIL import Image
+
+    location = {"hash": hashlib.md5(image_bytes).hexdigest()}
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        exif = img.getexif()
+
+        gps_raw = exif.get_ifd(GPS_INFO_TAG)
+        if gps_raw:
+            location.update(decode_gps_info(gps_raw))
+            if "latitude" in location and "longitude" in location:
+                location["has_location"] = True
+
+        if 0x010F in exif:
+            location["camera_make"] = exif[0x010F]
+        if 0x0110 in exif:
+            location["camera_model"] = exif[0x0110]
+        date_taken = exif.get_ifd(EXIF_IFD_TAG).get(0x9003)  # DateTimeOriginal
+        if date_taken:
+            location["date_taken"] = date_taken
+    except Exception as e:
+        logger.warning(f"Location extraction failed: {str(e)}")
+
+    return location
+
 def get_image_metadata(image_bytes):
     """
     Extract detailed metadata from image
     """
+    import base64
+    import numpy as np
+    from PIL import Image
+    from PIL.ExifTags import GPSTAGS, TAGS
+
     image_data = {}
     try:
         # Open image from bytes
@@ -78,6 +340,8 @@ def get_image_metadata(image_bytes):
         exif_data = {}
         if hasattr(img, '_getexif') and img._getexif():
             exif = img._getexif()
+            # Keep the raw GPS block; its rationals are lost once stringified below
+            gps_raw = exif.get(GPS_INFO_TAG)
             for tag_id, value in exif.items():
                 tag = TAGS.get(tag_id, tag_id)
                 # Skip binary data which can't be JSON serialized
@@ -135,18 +399,13 @@ def get_image_metadata(image_bytes):
                 image_data["focal_length"] = f"{exif_data.get('FocalLength')}mm"
             
             # GPS data if available
-            gps_info = {}
-            if 'GPSInfo' in exif_data:
+            if isinstance(gps_raw, dict):
                 try:
-                    gps_raw = exif_data.get('GPSInfo')
-                    if isinstance(gps_raw, dict):
-                        for key, val in gps_raw.items():
-                            gps_info[key] = str(val)
-                    image_data["gps_data"] = gps_info
+                    image_data["gps_data"] = {str(GPSTAGS.get(key, key)): str(val) for key, val in gps_raw.items()}
                     
-                    # Try to extract coordinates for map display
-                    if 'GPSLatitude' in gps_raw and 'GPSLongitude' in gps_raw:
-                        # This would require parsing the coordinates which can be complex
+                    # Decode coordinates for map display and the spatial index
+                    image_data.update(decode_gps_info(gps_raw))
+                    if "latitude" in image_data and "longitude" in image_data:
                         image_data["has_location"] = True
                 except Exception as e:
                     logger.warning(f"GPS parsing error: {str(e)}")
@@ -254,18 +513,26 @@ def query_huggingface_api(image_bytes):
     """
     Query the Hugging Face API with image data
     """
+    import requests
+    from flask import current_app
+
+    # Configuration is validated lazily so the app can start without credentials
+    ensure_config_validated(current_app)
+    api_url = current_app.config["HUGGING_FACE_API_URL"]
+    api_key = current_app.config["HUGGING_FACE_API_KEY"]
+
     try:
         # Use proper content-type for image data
         headers = {
-            "Authorization": f"Bearer {API_KEY}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/octet-stream"
         }
         
         # Time the API request for performance metrics
         start_time = time.time()
         
-        response = requests.post(
-            API_URL, 
+        response = get_http_session().post(
+            api_url, 
             headers=headers, 
             data=image_bytes,
             timeout=30
@@ -542,50 +809,483 @@ def extract_image_insights(predictions, metadata):
         logger.error(f"Error extracting insights: {str(e)}")
         return ["Could not generate insights for this image."]
 
+# --- Response Helpers ---
+# Fields that only repeat information already present elsewhere in the payload
+# (or that the client already has, like the thumbnail of the image it uploaded)
+COMPACT_DROPPED_METADATA = (
+    "exif",                   # Useful tags are already promoted to top-level fields
+    "thumbnail",              # Client already holds the original image
+    "file_size",              # Same as file_size_bytes
+    "total_processing_time",  # Same as processing_time_seconds
+    "avg_color",              # Same as avg_color_hex
+    "date_taken_formatted",   # Derivable from date_taken_unix
+    "camera",                 # Same as camera_make + camera_model
+    "gps_data",               # Decoded into latitude/longitude/altitude/gps_timestamp
+)
+
+def compact_response(payload):
+    """
+    Convert a full /upload response into the compact (schema 2) layout
+    """
+    if not isinstance(payload, dict):
+        return payload
+
+    compact = {k: v for k, v in payload.items() if k != "categories"}
+    compact["schema"] = 2
+
+    # Percentages are just formatted scores
+    if isinstance(compact.get("predictions"), list):
+        compact["predictions"] = [
+            {k: v for k, v in p.items() if k != "percentage"} if isinstance(p, dict) else p
+            for p in compact["predictions"]
+        ]
+
+    if isinstance(compact.get("metadata"), dict):
+        compact["metadata"] = _compact_metadata(compact["metadata"])
+
+    return compact
+
+def _compact_metadata(metadata):
+    """
+    Strip redundant fields from image metadata (and from the nested image
+    metadata that format_predictions places under metadata["metadata"])
+    """
+    metadata = {k: v for k, v in metadata.items() if k not in COMPACT_DROPPED_METADATA}
+    if isinstance(metadata.get("dominant_colors"), list):
+        metadata["dominant_colors"] = [c.get("hex") for c in metadata["dominant_colors"]]
+    if isinstance(metadata.get("metadata"), dict):
+        metadata["metadata"] = _compact_metadata(metadata["metadata"])
+    return metadata
+
+def _serialize_default(obj):
+    """
+    Fallback for values the serializers don't know about (numpy scalars, rationals, etc.)
+    """
+    # numpy values can only exist if numpy has already been imported
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.generic):
+        return obj.item()
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+def serialize_json(payload):
+    """
+    Serialize a payload to JSON bytes, using orjson when available
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_serialize_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(payload, default=_serialize_default, separators=(",", ":")).encode("utf-8")
+
+def deserialize_json(data):
+    """
+    Parse JSON bytes/str, using orjson when available
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def serialize_msgpack(payload):
+    """
+    Serialize a payload to MessagePack bytes
+    """
+    return msgpack.packb(payload, default=_serialize_default, use_bin_type=True)
+
+def compress_body(body, encoding):
+    """
+    Compress a response body with the given content encoding
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def negotiate_encoding(accept_encodings):
+    """
+    Pick the best supported content encoding from an Accept-Encoding header
+    """
+    supported = ["gzip"]
+    if brotli is not None:
+        supported.insert(0, "br")
+    return accept_encodings.best_match(supported)
+
+def api_response(payload, status=200):
+    """
+    Build an API response honouring the requested schema, format and compression
+
+    - ?schema=2 returns the compact layout (see compact_response)
+    - Accept: application/msgpack returns MessagePack (if msgpack is installed)
+    - Accept-Encoding: br / gzip compresses bodies larger than COMPRESSION_MIN_SIZE
+    """
+    from flask import current_app, request
+
+    if request.args.get("schema") == "2":
+        payload = compact_response(payload)
+
+    mimetype = "application/json"
+    if msgpack is not None:
+        mimetype = request.accept_mimetypes.best_match(("application/json",) + MSGPACK_MIMETYPES) or mimetype
+
+    if mimetype in MSGPACK_MIMETYPES:
+        body = serialize_msgpack(payload)
+    else:
+        body = serialize_json(payload)
+
+    encoding = None
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding:
+            body = compress_body(body, encoding)
+
+    response = current_app.response_class(body, status=status, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response
+
+# --- Spatial Index ---
+EARTH_RADIUS_KM = 6371.0088
+GEO_CELL_SIZE = 0.05  # Grid cell size in degrees (~5.5km north-south)
+NEARBY_DEFAULT_LIMIT = 100
+GEO_INDEX_TIMEOUT = 5  # Seconds to wait for another worker's write lock
+
+# Every change gets a new seq, so processes can catch up with "seq > last seen".
+# Removed images are kept as tombstones (deleted = 1) for the same reason.
+GEO_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geo_images (
+    hash TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    entry BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS geo_images_seq ON geo_images (seq);
+"""
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points in kilometres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _normalize_lon(lon):
+    """
+    Wrap a longitude into [-180, 180), leaving values already in range untouched
+    """
+    if -180 <= lon < 180:
+        return lon
+    return ((lon + 180) % 360) - 180
+
+def _split_lon_range(west, east):
+    """
+    Split a longitude range that crosses the antimeridian into non-wrapping pieces
+    """
+    if west <= east:
+        return [(west, east)]
+    return [(west, 180.0), (-180.0, east)]
+
+class GeoIndex:
+    """
+    Grid index of geotagged images, optionally backed by a SQLite database
+
+    Images are bucketed into GEO_CELL_SIZE-degree cells so radius and
+    bounding-box queries only scan the cells that overlap the query area.
+    Entries are keyed by image hash, so re-indexing an image replaces it.
+
+    With db_path set, the database is the source of truth and the grid is a
+    per-process cache: writes go to SQLite, and before every operation the
+    cache applies any changes committed since it last looked (including
+    those from other worker processes). The index therefore survives
+    restarts and is shared by all workers using the same file.
+    """
+
+    def __init__(self, db_path=None, cell_size=GEO_CELL_SIZE):
+        import threading
+
+        self.db_path = db_path
+        self.cell_size = cell_size
+        self._cells = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._seq = 0  # Last database change applied to the cache
+
+    def __len__(self):
+        with self._lock:
+            self._sync_locked()
+            return len(self._entries)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _connection(self):
+        """
+        Return this process's SQLite connection (connections must not cross a fork)
+        """
+        if self._conn is None or self._conn_pid != os.getpid():
+            import sqlite3
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=GEO_INDEX_TIMEOUT, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(GEO_INDEX_SCHEMA)
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _write_locked(self, rows):
+        """
+        Store (hash, deleted, entry_json) rows with fresh sequence numbers in one transaction
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")  # Serializes writers so seq never goes backwards
+        try:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM geo_images").fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO geo_images (hash, seq, deleted, entry) VALUES (?, ?, ?, ?)",
+                [(key, seq + i, deleted, entry) for i, (key, deleted, entry) in enumerate(rows, 1)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _sync_locked(self):
+        """
+        Apply database changes made since the last sync to the grid cache
+        """
+        if self.db_path is None:
+            return
+        rows = self._connection().execute(
+            "SELECT seq, hash, deleted, entry FROM geo_images WHERE seq > ? ORDER BY seq", (self._seq,)
+        ).fetchall()
+        for seq, key, deleted, entry in rows:
+            if deleted:
+                if key in self._entries:
+                    self._remove_locked(key)
+            else:
+                self._add_locked(deserialize_json(entry))
+            self._seq = seq
+
+    def _add_locked(self, entry):
+        key = entry["hash"]
+        if key in self._entries:
+            self._remove_locked(key)
+        cell = self._cell(entry["latitude"], entry["longitude"])
+        self._cells.setdefault(cell, []).append(entry)
+        self._entries[key] = (cell, entry)
+
+    def _remove_locked(self, key):
+        cell, entry = self._entries.pop(key)
+        bucket = self._cells[cell]
+        bucket.remove(entry)
+        if not bucket:
+            del self._cells[cell]
+
+    def add(self, entry):
+        """
+        Index one entry (a dict with hash, latitude and longitude)
+        """
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        """
+        Bulk-index entries in a single transaction; returns the number indexed
+        """
+        entries = [dict(e, longitude=_normalize_lon(e["longitude"])) for e in entries]
+        with self._lock:
+            if self.db_path is None:
+                for entry in entries:
+                    self._add_locked(entry)
+            else:
+                self._write_locked([(e["hash"], 0, serialize_json(e)) for e in entries])
+                self._sync_locked()
+        return len(entries)
+
+    def remove(self, key):
+        """
+        Remove an entry by image hash; returns False if it wasn't indexed
+        """
+        with self._lock:
+            self._sync_locked()
+            if key not in self._entries:
+                return False
+            if self.db_path is None:
+                self._remove_locked(key)
+            else:
+                self._write_locked([(key, 1, b"{}")])
+                self._sync_locked()
+            return True
+
+    def _candidates(self, south, north, lon_ranges):
+        """
+        Return entries from every cell overlapping the given lat/lon ranges
+        """
+        rows = range(math.floor(south / self.cell_size), math.floor(north / self.cell_size) + 1)
+        cols = set()
+        for west, east in lon_ranges:
+            cols.update(range(math.floor(west / self.cell_size), math.floor(east / self.cell_size) + 1))
+
+        with self._lock:
+            self._sync_locked()
+            # For very large query areas it's cheaper to walk the occupied cells
+            if len(rows) * len(cols) > len(self._cells):
+                cells = [c for c in self._cells if c[0] in rows and c[1] in cols]
+            else:
+                cells = [(r, c) for r in rows for c in cols if (r, c) in self._cells]
+            return [entry for cell in cells for entry in self._cells[cell]]
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Return entries inside a bounding box (west > east crosses the antimeridian)
+        """
+        if west == east:
+            # Zero-width strip; normalize both ends the same way
+            lon_ranges = [(_normalize_lon(west), _normalize_lon(east))]
+        else:
+            lon_ranges = _split_lon_range(_normalize_lon(west), 180.0 if east == 180 else _normalize_lon(east))
+        results = [
+            entry for entry in self._candidates(south, north, lon_ranges)
+            if south <= entry["latitude"] <= north
+            and any(w <= entry["longitude"] <= e for w, e in lon_ranges)
+        ]
+        results.sort(key=lambda e: (e["latitude"], e["longitude"]))
+        return results
+
+    def nearby(self, lat, lon, radius_km):
+        """
+        Return entries within radius_km of a point, nearest first, with distance_km added
+        """
+        # Bounding box of the search circle on the same sphere haversine_km uses,
+        # padded by a cell so points right at the edge are never skipped
+        angular = radius_km / EARTH_RADIUS_KM
+        d_lat = math.degrees(angular) + self.cell_size
+        south, north = lat - d_lat, lat + d_lat
+
+        if south <= -90 or north >= 90:
+            # The circle may contain a pole, so every longitude is in range
+            south, north = max(south, -90.0), min(north, 90.0)
+            lon_ranges = [(-180.0, 180.0)]
+        else:
+            ratio = math.sin(angular) / math.cos(math.radians(lat))
+            d_lon = math.degrees(math.asin(ratio)) + self.cell_size if ratio < 1 else 180.0
+            if d_lon >= 180:
+                lon_ranges = [(-180.0, 180.0)]
+            else:
+                lon_ranges = _split_lon_range(_normalize_lon(lon - d_lon), _normalize_lon(lon + d_lon))
+
+        results = []
+        for entry in self._candidates(south, north, lon_ranges):
+            distance = haversine_km(lat, lon, entry["latitude"], entry["longitude"])
+            if distance <= radius_km:
+                results.append(dict(entry, distance_km=round(distance, 3)))
+        results.sort(key=lambda e: e["distance_km"])
+        return results
+
+def geo_index_entry(metadata):
+    """
+    Build a spatial index entry from image metadata, or None if it has no location
+
+    Works with both get_image_metadata and get_image_location output; their
+    placeholder values ("Not available", "Unknown") are left out so an image
+    gets the same entry whichever way it was ingested.
+    """
+    if not metadata.get("has_location") or "hash" not in metadata:
+        return None
+
+    entry = {
+        "hash": metadata["hash"],
+        "filename": metadata.get("filename"),
+        "latitude": metadata["latitude"],
+        "longitude": metadata["longitude"],
+    }
+    for key in ("altitude", "gps_timestamp"):
+        if key in metadata:
+            entry[key] = metadata[key]
+
+    if metadata.get("date_taken") not in (None, "", "Not available"):
+        entry["date_taken"] = metadata["date_taken"]
+
+    camera = " ".join(
+        str(metadata[key]).strip() for key in ("camera_make", "camera_model")
+        if metadata.get(key) not in (None, "", "Unknown")
+    )
+    if camera:
+        entry["camera"] = camera
+    return entry
+
+def index_image_batch(geo_index, images):
+    """
+    Read the locations of a batch of (filename, image_bytes) pairs and bulk-index
+    the geotagged ones. Returns (indexed_count, skipped_filenames).
+    """
+    entries = []
+    skipped = []
+    for filename, image_bytes in images:
+        metadata = get_image_location(image_bytes)
+        metadata["filename"] = filename
+        entry = geo_index_entry(metadata)
+        if entry:
+            entries.append(entry)
+        else:
+            skipped.append(filename)
+
+    return geo_index.add_many(entries), skipped
+
 # --- Flask Routes ---
-@app.route('/')
 def index():
     """
     Render the main page
     """
+    from flask import render_template
+
     return render_template('index.html')
 
-@app.route('/upload', methods=['POST'])
 def upload():
     """
     Handle file upload and image classification
     """
+    from flask import current_app, request
+
     try:
         # Validate file upload
         if 'file1' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
+            return api_response({"error": "No file uploaded"}, 400)
             
         file = request.files['file1']
         
         if file.filename == '' or file.filename is None:
-            return jsonify({"error": "No file selected"}), 400
+            return api_response({"error": "No file selected"}, 400)
         
         # Validate file type with better error handling
         allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
         
         # Check if filename contains a dot
         if '.' not in file.filename:
-            return jsonify({
+            return api_response({
                 "error": "File must have an extension. Supported types: " + ', '.join(allowed_extensions)
-            }), 400
+            }, 400)
         
         file_extension = file.filename.rsplit('.', 1)[-1].lower()
         
         if not file_extension or file_extension not in allowed_extensions:
-            return jsonify({
+            return api_response({
                 "error": f"Unsupported file type: {file_extension}. Supported types: {', '.join(allowed_extensions)}"
-            }), 400
+            }, 400)
         
         # Read image data
         image_bytes = file.read()
         
         if len(image_bytes) == 0:
-            return jsonify({"error": "Empty file uploaded"}), 400
+            return api_response({"error": "Empty file uploaded"}, 400)
         
         logger.info(f"Processing file: {file.filename} ({len(image_bytes)} bytes)")
         logger.info(f"File extension: {file_extension}")
@@ -599,6 +1299,15 @@ def upload():
         # Add filename to metadata
         image_metadata["filename"] = file.filename
         
+        # Make geotagged images searchable via /nearby and /within
+        geo_entry = geo_index_entry(image_metadata)
+        if geo_entry:
+            try:
+                current_app.extensions["geo_index"].add(geo_entry)
+            except Exception as e:
+                # Indexing is best-effort; don't lose the analysis over it
+                logger.warning(f"Could not index image location: {str(e)}")
+        
         try:
             # Query Hugging Face API
             response = query_huggingface_api(image_bytes)
@@ -612,7 +1321,7 @@ def upload():
                 logger.error(f"API error: {error_msg}")
                 # Return the error with metadata for the frontend
                 result["metadata"] = image_metadata
-                return jsonify(result), 200  # Return 200 to let frontend handle the error display
+                return api_response(result, 200)  # Return 200 to let frontend handle the error display
             
             # Add metadata to result
             if isinstance(result, dict):
@@ -634,7 +1343,7 @@ def upload():
                 formatted_result["metadata"]["total_processing_time"] = f"{total_time:.2f} seconds"
                 formatted_result["metadata"]["processing_time_seconds"] = total_time
             
-            return jsonify(formatted_result)
+            return api_response(formatted_result)
         except Exception as api_error:
             logger.error(f"API request error: {str(api_error)}")
             logger.error(traceback.format_exc())
@@ -645,50 +1354,154 @@ def upload():
                 "metadata": image_metadata,
                 "details": str(api_error)
             }
-            return jsonify(error_response), 200  # Return 200 to let frontend handle the error
+            return api_response(error_response, 200)  # Return 200 to let frontend handle the error
         
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         logger.error(traceback.format_exc())
-        return jsonify({
+        return api_response({
             "error": "An unexpected error occurred while processing your image.",
             "details": str(e)
-        }), 500
+        }, 500)
 
-@app.route('/health')
 def health_check():
     """
     Health check endpoint
     """
+    from flask import current_app, jsonify
+
     # Test API key validity
-    api_key_status = "valid" if API_KEY and len(API_KEY) > 30 else "potentially_invalid"
+    api_key = current_app.config.get("HUGGING_FACE_API_KEY")
+    api_key_status = "valid" if api_key and len(api_key) > 30 else "potentially_invalid"
     
     return jsonify({
         "status": "healthy",
-        "api_url": API_URL,
+        "api_url": current_app.config.get("HUGGING_FACE_API_URL"),
         "api_key_status": api_key_status,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     })
 
+def _float_arg(args, name, minimum, maximum, default=None):
+    """
+    Read a numeric query parameter, raising ValueError with a user-facing message
+    """
+    raw = args.get(name)
+    if raw is None or raw == "":
+        if default is not None:
+            return default
+        raise ValueError(f"Missing required parameter: {name}")
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be a number")
+    if not math.isfinite(value) or not minimum <= value <= maximum:
+        raise ValueError(f"Parameter {name} must be between {minimum} and {maximum}")
+    return value
+
+def _limited_results(results, limit):
+    """
+    Cut query results to limit, reporting the full match count so clients can tell
+    """
+    return {
+        "count": min(len(results), limit),
+        "total": len(results),
+        "truncated": len(results) > limit,
+        "results": results[:limit]
+    }
+
+def nearby():
+    """
+    Find indexed images within a radius (km) of a point
+    """
+    from flask import current_app, request
+
+    try:
+        lat = _float_arg(request.args, "lat", -90, 90)
+        lon = _float_arg(request.args, "lon", -180, 180)
+        radius = _float_arg(request.args, "radius", 0, EARTH_RADIUS_KM * math.pi, default=1.0)
+        limit = int(_float_arg(request.args, "limit", 1, 10_000, default=NEARBY_DEFAULT_LIMIT))
+    except ValueError as e:
+        return api_response({"error": str(e)}, 400)
+
+    results = current_app.extensions["geo_index"].nearby(lat, lon, radius)
+    return api_response({
+        "query": {"lat": lat, "lon": lon, "radius_km": radius},
+        **_limited_results(results, limit)
+    })
+
+def within():
+    """
+    Find indexed images inside a bounding box
+    """
+    from flask import current_app, request
+
+    try:
+        south = _float_arg(request.args, "south", -90, 90)
+        west = _float_arg(request.args, "west", -180, 180)
+        north = _float_arg(request.args, "north", -90, 90)
+        east = _float_arg(request.args, "east", -180, 180)
+        limit = int(_float_arg(request.args, "limit", 1, 10_000, default=NEARBY_DEFAULT_LIMIT))
+    except ValueError as e:
+        return api_response({"error": str(e)}, 400)
+
+    if south > north:
+        return api_response({"error": "Parameter south must not be greater than north"}, 400)
+
+    results = current_app.extensions["geo_index"].within_bbox(south, west, north, east)
+    return api_response({
+        "query": {"south": south, "west": west, "north": north, "east": east},
+        **_limited_results(results, limit)
+    })
+
+def index_images():
+    """
+    Bulk-index the locations of several uploaded images (no classification)
+    """
+    from flask import current_app, request
+
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        return api_response({"error": "No files uploaded"}, 400)
+
+    start_time = time.time()
+    geo_index = current_app.extensions["geo_index"]
+    indexed, skipped = index_image_batch(geo_index, ((f.filename, f.read()) for f in files))
+    logger.info(f"Indexed {indexed} of {len(files)} images in {time.time() - start_time:.2f} seconds")
+
+    return api_response({
+        "indexed": indexed,
+        "skipped": skipped,
+        "total_indexed": len(geo_index)
+    })
+
 # --- Error Handlers ---
-@app.errorhandler(413)
 def too_large(e):
+    from flask import jsonify
     return jsonify({"error": "File too large. Maximum size is 16MB."}), 413
 
-@app.errorhandler(500)
 def internal_server_error(e):
+    from flask import jsonify
     return jsonify({"error": "Internal server error"}), 500
 
 # --- Run Application ---
 if __name__ == '__main__':
+    import threading
+    import webbrowser
+
+    app = create_app()
+    api_url = app.config["HUGGING_FACE_API_URL"]
+    debug = app.config["FLASK_DEBUG"]
+
+    # Fail fast when running the server directly
+    ensure_config_validated(app)
+
     logger.info(f"Starting Flask app...")
-    logger.info(f"API URL: {API_URL}")
-    logger.info(f"Debug mode: {FLASK_DEBUG}")
+    logger.info(f"API URL: {api_url}")
+    logger.info(f"Debug mode: {debug}")
     
-    # Test API key format
-    if API_KEY == "hf_your_actual_api_key_here" or len(API_KEY) < 30:
-        logger.warning("⚠️ WARNING: You appear to be using a placeholder API key. The application may not work correctly.")
-        logger.warning("Please replace it with a valid Hugging Face API key in your .env file.")
+    # Load codecs and connect to the API before serving (in the process that serves)
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up(api_url)
     
     # Function to open browser after a short delay
     def open_browser():
@@ -705,5 +1518,5 @@ if __name__ == '__main__':
     app.run(
         host='0.0.0.0', 
         port=81, 
-        debug=FLASK_DEBUG
-    )
\ No newline at end of file
+        debug=debug
+    )
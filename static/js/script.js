@@ -585,7 +585,10 @@ document.addEventListener('DOMContentLoaded', function() {
             cameraHTML += createMetadataItem('Focal Length', metadata.focal_length);
             cameraHTML += createMetadataItem('Date Taken', metadata.date_taken_formatted);
             if (metadata.has_location) {
-                cameraHTML += createMetadataItem('Location', 'GPS data present');
+                cameraHTML += createMetadataItem('Location', `${metadata.latitude.toFixed(5)}, ${metadata.longitude.toFixed(5)}`);
+                if (metadata.altitude !== undefined) {
+                    cameraHTML += createMetadataItem('Altitude', `${metadata.altitude} m`);
+                }
             }
             cameraMetadata.innerHTML = cameraHTML || '<p>No camera information available in EXIF data.</p>';
         }